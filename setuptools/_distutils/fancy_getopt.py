@@ -19,6 +19,13 @@ from distutils.errors import *
 longopt_pat = r'[a-zA-Z](?:[a-zA-Z0-9-]*)'
 longopt_re = re.compile(r'^%s$' % longopt_pat)
 
+# The same check as 'longopt_re', done with a lookup table rather than
+# the regex engine: the first character must be a letter, and deleting
+# every allowed character must leave nothing behind.
+longopt_first = frozenset(string.ascii_letters)
+longopt_strip = str.maketrans('', '',
+                              string.ascii_letters + string.digits + '-')
+
 # For recognizing "negative alias" options, eg. "quiet=!verbose"
 neg_alias_re = re.compile("^(%s)=!(%s)$" % (longopt_pat, longopt_pat))
 
@@ -26,6 +33,12 @@ neg_alias_re = re.compile("^(%s)=!(%s)$" % (longopt_pat, longopt_pat))
 # (for use as attributes of some object).
 longopt_xlate = str.maketrans('-', '_')
 
+# Help text already generated by 'FancyGetopt.generate_help()', keyed by
+# (header, option table contents).  Emptied once it grows past
+# 'help_cache_max' entries.
+help_cache = {}
+help_cache_max = 64
+
 class FancyGetopt:
     """Wrapper around the standard 'getopt()' module that provides some
     handy extra functionality:
@@ -38,6 +51,10 @@ class FancyGetopt:
         on the command line sets 'verbose' to false
     """
 
+    __slots__ = ('option_table', 'option_index', 'alias', 'negative_alias',
+                 'short_opts', 'long_opts', 'short2long', 'attr_name',
+                 'takes_arg', 'repeat', 'dispatch', '_grokked', 'option_order')
+
     def __init__(self, option_table=None):
         # The option table is (currently) a list of tuples.  The
         # tuples may have 3 or four values:
@@ -73,15 +90,27 @@ class FancyGetopt:
         self.attr_name = {}
         self.takes_arg = {}
 
+        # 'dispatch' maps each option string that 'getopt.getopt()' can
+        # hand back ("--foo", "-f") to what it finally means: a tuple
+        # (option name, attribute name, value), where value is 1 or 0 for
+        # boolean options and None for options that take an argument.
+        # Aliases and negative aliases are already resolved, so this is
+        # rebuilt whenever the option table or either alias dict changes.
+        self.dispatch = {}
+
+        # '_grokked' is a snapshot of the option table and aliases the
+        # structures above were built from (None until they're built), so
+        # 'getopt()' can tell whether any of them has changed since --
+        # including changes made in place rather than through the setters.
+        self._grokked = None
+
         # And 'option_order' is filled up in 'getopt()'; it records the
         # original order of options (and their values) on the command-line,
         # but expands short options, converts aliases, etc.
         self.option_order = []
 
     def _build_index(self):
-        self.option_index.clear()
-        for option in self.option_table:
-            self.option_index[option[0]] = option
+        self.option_index = {option[0]: option for option in self.option_table}
 
     def set_option_table(self, option_table):
         self.option_table = option_table
@@ -133,12 +162,24 @@ class FancyGetopt:
     def _grok_option_table(self):
         """Populate the various data structures that keep tabs on the
         option table.  Called by 'getopt()' before it can do anything
-        worthwhile.
+        worthwhile; does nothing if the option table and aliases haven't
+        changed since the last call.
         """
+        snapshot = (tuple(self.option_table),
+                    tuple(self.alias.items()),
+                    tuple(self.negative_alias.items()))
+        if snapshot == self._grokked:
+            return
+        # Forget the old snapshot before touching anything, so that if
+        # this rebuild fails partway we won't mistake the half-built
+        # structures for a good set next time round.
+        self._grokked = None
+
         self.long_opts = []
         self.short_opts = []
         self.short2long.clear()
         self.repeat = {}
+        names = []                      # long options with '=' stripped
 
         for option in self.option_table:
             if len(option) == 3:
@@ -197,16 +238,37 @@ class FancyGetopt:
             # later translate it to an attribute name on some object.  Have
             # to do this a bit late to make sure we've removed any trailing
             # '='.
-            if not longopt_re.match(long):
+            if long[0] not in longopt_first or long.translate(longopt_strip):
                 raise DistutilsGetoptError(
                        "invalid long option name '%s' "
                        "(must be letters, numbers, hyphens only" % long)
 
             self.attr_name[long] = self.get_attr_name(long)
+            names.append(long)
             if short:
                 self.short_opts.append(short)
                 self.short2long[short[0]] = long
 
+        # Now that every option has been seen, work out once what each of
+        # them does, rather than following the aliases on every parse.
+        self.dispatch = {}
+        for long in names:
+            opt = self.alias.get(long) or long
+            if self.takes_arg[opt]:
+                value = None
+            else:
+                alias_to = self.negative_alias.get(opt)
+                if alias_to:
+                    opt = alias_to
+                    value = 0
+                else:
+                    value = 1
+            self.dispatch['--' + long] = (opt, self.attr_name[opt], value)
+        for short, long in self.short2long.items():
+            self.dispatch['-' + short] = self.dispatch['--' + long]
+
+        self._grokked = snapshot
+
     def getopt(self, args=None, object=None):
         """Parse command-line options in args. Store as attributes on object.
 
@@ -228,41 +290,48 @@ class FancyGetopt:
 
         self._grok_option_table()
 
-        short_opts = ' '.join(self.short_opts)
+        short_opts = ''.join(self.short_opts)
         try:
             opts, args = getopt.getopt(args, short_opts, self.long_opts)
         except getopt.error as msg:
             raise DistutilsArgError(msg)
 
-        for opt, val in opts:
-            if len(opt) == 2 and opt[0] == '-': # it's a short option
-                opt = self.short2long[opt[1]]
-            else:
-                assert len(opt) > 2 and opt[:2] == '--'
-                opt = opt[2:]
+        # Bind the lookup tables to locals: this loop runs once per option
+        # on the command line.
+        dispatch = self.dispatch
+        repeat = self.repeat
+        order_append = self.option_order.append
 
-            alias = self.alias.get(opt)
-            if alias:
-                opt = alias
+        # Option values are collected here and stored on 'object' once
+        # the whole command line has been processed.
+        results = {}
 
-            if not self.takes_arg[opt]:     # boolean option?
+        for opt, val in opts:
+            opt, attr, value = dispatch[opt]
+            if value is not None:           # boolean option?
                 assert val == '', "boolean option can't have value"
-                alias = self.negative_alias.get(opt)
-                if alias:
-                    opt = alias
-                    val = 0
-                else:
-                    val = 1
+                val = value
 
-            attr = self.attr_name[opt]
             # The only repeating option at the moment is 'verbose'.
             # It has a negative option -q quiet, which should set verbose = 0.
-            if val and self.repeat.get(attr) is not None:
-                val = getattr(object, attr, 0) + 1
-            setattr(object, attr, val)
-            self.option_order.append((opt, val))
+            if val and repeat.get(attr) is not None:
+                if attr in results:
+                    val = results[attr] + 1
+                else:
+                    val = getattr(object, attr, 0) + 1
+            results[attr] = val
+            order_append((opt, val))
 
         # for opts
+
+        # OptionDummy is a plain instance, so we can fill in its __dict__
+        # in one go; anything else gets the usual setattr() treatment.
+        if type(object) is OptionDummy:
+            object.__dict__.update(results)
+        else:
+            for attr, val in results.items():
+                setattr(object, attr, val)
+
         if created_object:
             return args, object
         else:
@@ -282,21 +351,38 @@ class FancyGetopt:
         """Generate help text (a list of strings, one per suggested line of
         output) from the option table for this FancyGetopt object.
         """
+        # The help text depends only on the header and the option table,
+        # so reuse it if we've seen this exact table before.  Tables that
+        # can't be hashed (eg. options given as lists) just aren't cached.
+        try:
+            key = (header, tuple(self.option_table))
+            lines = help_cache.get(key)
+        except TypeError:
+            return self._generate_help(header)
+        if lines is None:
+            lines = self._generate_help(header)
+            if len(help_cache) >= help_cache_max:
+                help_cache.clear()
+            help_cache[key] = lines = tuple(lines)
+        return list(lines)
+
+    def _generate_help(self, header):
         # Blithely assume the option table is good: probably wouldn't call
         # 'generate_help()' unless you've already called 'getopt()'.
 
-        # First pass: determine maximum length of long option names
-        max_opt = 0
+        # Strip the "takes an argument" '=' from each long option once, up
+        # front, since both passes below want the bare name.
+        options = []
         for option in self.option_table:
-            long = option[0]
-            short = option[1]
-            l = len(long)
+            long, short, help = option[:3]
             if long[-1] == '=':
-                l = l - 1
-            if short is not None:
-                l = l + 5                   # " (-x)" where short == 'x'
-            if l > max_opt:
-                max_opt = l
+                long = long[0:-1]
+            options.append((long, short, help))
+
+        # First pass: determine maximum length of long option names
+        # (plus 5 for " (-x)" where there's a short option 'x')
+        max_opt = max((len(long) + (5 if short is not None else 0)
+                       for long, short, help in options), default=0)
 
         opt_width = max_opt + 2 + 2 + 2     # room for indent + dashes + gutter
 
@@ -330,28 +416,25 @@ class FancyGetopt:
         else:
             lines = ['Option summary:']
 
-        for option in self.option_table:
-            long, short, help = option[:3]
+        for long, short, help in options:
             text = wrap_text(help, text_width)
-            if long[-1] == '=':
-                long = long[0:-1]
 
             # Case 1: no short option at all (makes life easy)
             if short is None:
                 if text:
-                    lines.append("  --%-*s  %s" % (max_opt, long, text[0]))
+                    lines.append("  --" + long.ljust(max_opt) + "  " + text[0])
                 else:
-                    lines.append("  --%-*s  " % (max_opt, long))
+                    lines.append("  --" + long.ljust(max_opt) + "  ")
 
             # Case 2: we have a short option, so we have to include it
             # just after the long option
             else:
-                opt_names = "%s (-%s)" % (long, short)
+                opt_names = long + " (-" + short + ")"
                 if text:
-                    lines.append("  --%-*s  %s" %
-                                 (max_opt, opt_names, text[0]))
+                    lines.append("  --" + opt_names.ljust(max_opt) + "  " +
+                                 text[0])
                 else:
-                    lines.append("  --%-*s" % opt_names)
+                    lines.append("  --" + opt_names.ljust(max_opt) + "  ")
 
             for l in text[1:]:
                 lines.append(big_indent + l)
@@ -360,8 +443,7 @@ class FancyGetopt:
     def print_help(self, header=None, file=None):
         if file is None:
             file = sys.stdout
-        for line in self.generate_help(header):
-            file.write(line + "\n")
+        file.write("\n".join(self.generate_help(header)) + "\n")
 
 
 def fancy_getopt(options, negative_opt, object, args):
@@ -372,6 +454,10 @@ def fancy_getopt(options, negative_opt, object, args):
 
 WS_TRANS = {ord(_wschar) : ' ' for _wschar in string.whitespace}
 
+# For splitting help text into runs of spaces, runs of hyphens, and words
+# (used by 'wrap_text()').
+wschunk_re = re.compile(r'( +|-+)')
+
 def wrap_text(text, width):
     """wrap_text(text : string, width : int) -> [string]
 
@@ -385,19 +471,24 @@ def wrap_text(text, width):
 
     text = text.expandtabs()
     text = text.translate(WS_TRANS)
-    chunks = re.split(r'( +|-+)', text)
-    chunks = [ch for ch in chunks if ch] # ' - ' results in empty strings
+    # ' - ' results in empty strings, so drop those as we split
+    chunks = [ch for ch in wschunk_re.split(text) if ch]
     lines = []
 
-    while chunks:
+    # Walk 'chunks' with an index rather than deleting from the front of
+    # the list, which would make wrapping quadratic in the number of chunks.
+    i = 0                               # index of next chunk to place
+    n = len(chunks)
+
+    while i < n:
         cur_line = []                   # list of chunks (to-be-joined)
         cur_len = 0                     # length of current line
 
-        while chunks:
-            l = len(chunks[0])
+        while i < n:
+            l = len(chunks[i])
             if cur_len + l <= width:    # can squeeze (at least) this chunk in
-                cur_line.append(chunks[0])
-                del chunks[0]
+                cur_line.append(chunks[i])
+                i = i + 1
                 cur_len = cur_len + l
             else:                       # this line is full
                 # drop last chunk if all space
@@ -405,19 +496,19 @@ def wrap_text(text, width):
                     del cur_line[-1]
                 break
 
-        if chunks:                      # any chunks left to process?
+        if i < n:                       # any chunks left to process?
             # if the current line is still empty, then we had a single
             # chunk that's too big too fit on a line -- so we break
             # down and break it up at the line width
             if cur_len == 0:
-                cur_line.append(chunks[0][0:width])
-                chunks[0] = chunks[0][width:]
+                cur_line.append(chunks[i][0:width])
+                chunks[i] = chunks[i][width:]
 
             # all-whitespace chunks at the end of a line can be discarded
             # (and we know from the re.split above that if a chunk has
             # *any* whitespace, it is *all* whitespace)
-            if chunks[0][0] == ' ':
-                del chunks[0]
+            if chunks[i][0] == ' ':
+                i = i + 1
 
         # and store this line in the list-of-all-lines -- as a single
         # string, of course!
@@ -0,0 +1,116 @@
+"""Tests for distutils.fancy_getopt."""
+import unittest
+
+from distutils.errors import DistutilsArgError, DistutilsGetoptError
+from distutils.fancy_getopt import FancyGetopt
+from test.support import run_unittest
+
+
+class FancyGetoptTestCase(unittest.TestCase):
+
+    def test_generate_help_without_help_text(self):
+        parser = FancyGetopt([('foo', 'f', None), ('bar=', None, 'x')])
+        self.assertEqual(parser.generate_help(),
+                         ['Option summary:',
+                          '  --foo (-f)  ',
+                          '  --bar       x'])
+
+    def test_space_is_not_a_short_option(self):
+        # the short-option spec handed to getopt must not contain spaces
+        parser = FancyGetopt([('verbose', 'v', 'x'), ('quiet', 'q', 'y')])
+        self.assertRaises(DistutilsArgError, parser.getopt, ['- '])
+
+    def test_reparse_after_add_option(self):
+        parser = FancyGetopt([('verbose', 'v', "run verbosely")])
+        args, opts = parser.getopt(['-v'])
+        self.assertEqual(opts.verbose, 1)
+
+        parser.add_option('dry-run', 'n', "don't actually do anything")
+        args, opts = parser.getopt(['-n', 'build'])
+        self.assertEqual(args, ['build'])
+        self.assertEqual(opts.dry_run, 1)
+
+    def test_reparse_after_set_option_table(self):
+        parser = FancyGetopt([('verbose', 'v', "run verbosely")])
+        parser.getopt(['-v'])
+
+        parser.set_option_table([('force', 'f', "forcibly build everything")])
+        args, opts = parser.getopt(['-f'])
+        self.assertEqual(opts.force, 1)
+        self.assertRaises(DistutilsArgError, parser.getopt, ['-v'])
+
+    def test_reparse_after_option_table_changed_in_place(self):
+        table = [('verbose', 'v', "run verbosely")]
+        parser = FancyGetopt(table)
+        parser.getopt(['-v'])
+
+        table.append(('dry-run', 'n', "don't actually do anything"))
+        args, opts = parser.getopt(['-n'])
+        self.assertEqual(opts.dry_run, 1)
+
+        table[0] = ('force', 'f', "forcibly build everything")
+        args, opts = parser.getopt(['-f'])
+        self.assertEqual(opts.force, 1)
+        self.assertRaises(DistutilsArgError, parser.getopt, ['-v'])
+
+    def test_reparse_after_aliases_changed_in_place(self):
+        parser = FancyGetopt([('verbose', 'v', "run verbosely"),
+                              ('quiet', 'q', "run quietly"),
+                              ('loud', None, "same as --verbose")])
+        args, opts = parser.getopt(['-q'])
+        self.assertEqual(opts.quiet, 1)
+        self.assertEqual(parser.get_option_order(), [('quiet', 1)])
+
+        parser.negative_alias['quiet'] = 'verbose'
+        args, opts = parser.getopt(['-q'])
+        self.assertEqual(opts.verbose, 0)
+        self.assertFalse(hasattr(opts, 'quiet'))
+        self.assertEqual(parser.get_option_order(),
+                         [('quiet', 1), ('verbose', 0)])
+
+        parser.alias['loud'] = 'verbose'
+        args, opts = parser.getopt(['--loud'])
+        self.assertEqual(opts.verbose, 1)
+        self.assertFalse(hasattr(opts, 'loud'))
+        self.assertEqual(parser.get_option_order(),
+                         [('quiet', 1), ('verbose', 0), ('verbose', 1)])
+
+    def test_reparse_after_bad_negative_alias_and_revert(self):
+        parser = FancyGetopt([('name=', None, "set the name"),
+                              ('verbose', 'v', "run verbosely"),
+                              ('quiet', 'q', "run quietly")])
+        parser.getopt(['-q'])
+
+        # a negative alias can't point at an option that takes a value
+        parser.negative_alias['quiet'] = 'name'
+        self.assertRaises(DistutilsGetoptError, parser.getopt, ['-q'])
+
+        del parser.negative_alias['quiet']
+        args, opts = parser.getopt(['-q', '--name=x'])
+        self.assertEqual(opts.quiet, 1)
+        self.assertEqual(opts.name, 'x')
+        self.assertEqual(parser.get_option_order(),
+                         [('quiet', 1), ('quiet', 1), ('name', 'x')])
+
+    def test_reparse_after_failed_grok_and_revert(self):
+        table = [('verbose', 'v', "run verbosely")]
+        parser = FancyGetopt(table)
+        parser.getopt([])
+
+        table.extend([('dry-run', 'n', "don't actually do anything"),
+                      ('bad_name', None, "not a valid option name")])
+        self.assertRaises(DistutilsGetoptError, parser.getopt, [])
+
+        # back to the table that was last parsed successfully
+        del table[1:]
+        for args in (['-n'], ['--dry-run'], ['--bad_name']):
+            self.assertRaises(DistutilsArgError, parser.getopt, args)
+        args, opts = parser.getopt(['-v'])
+        self.assertEqual(opts.verbose, 1)
+
+
+def test_suite():
+    return unittest.makeSuite(FancyGetoptTestCase)
+
+if __name__ == "__main__":
+    run_unittest(test_suite())